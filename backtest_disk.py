@@ -0,0 +1,219 @@
+import io
+import os
+import json
+import mmap
+import codecs
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+from backtest_parser import JSON_PREFIX, build_columns, iter_json_array, parse_backtest_columns, parse_dates
+
+# Uploads above this size are analyzed out of core instead of decoded in memory.
+# Keep it well below server.maxUploadSize in .streamlit/config.toml.
+OUT_OF_CORE_MB = int(os.environ.get('BACKTEST_OUT_OF_CORE_MB', 64))
+
+# Directory of reports the app may open from the server's disk. Streamlit
+# holds every upload in memory, so reports too large to upload go here.
+REPORT_DIR = os.environ.get('BACKTEST_REPORT_DIR')
+
+# Bytes of the report decoded per read. Decoded day records are converted and
+# written once a batch holds this many setups (or days, for days without any),
+# so memory does not grow with the size of each day.
+READ_BYTES = 1024 * 1024
+BATCH_SETUPS = 5000
+BATCH_DAYS = 1000
+
+DAY_COLUMNS = {
+    'day_date': np.int32,
+    'day_pnl': np.float64,
+    'day_trades': np.int32,
+    'day_sum_pnl': np.float64,
+    'day_vix': np.float64,
+}
+SETUP_COLUMNS = {
+    'setup_day': np.int32,
+    'setup_strategy': np.int32,
+    'setup_pnl': np.float64,
+    'setup_max': np.float64,
+    'setup_min': np.float64,
+    'setup_vix': np.float64,
+    'setup_sl_hit': np.bool_,
+}
+
+
+class DiskReport(dict):
+    """Columnar report whose columns are memory-mapped from an on-disk store.
+
+    Behaves like the dict returned by `parse_backtest_columns`; the store
+    directory is removed once the report is garbage collected.
+    """
+
+
+def spool(fileobj, directory, chunk_bytes=READ_BYTES):
+    """Copy an uploaded file to disk in chunks and return the path."""
+    path = os.path.join(directory, 'report.htm')
+    fileobj.seek(0)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(fileobj, f, chunk_bytes)
+    return path
+
+
+def _read_text(mm, position, read_bytes):
+    text = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = mm[position:position + read_bytes]
+        position += len(chunk)
+        yield text.decode(chunk, final=not chunk)
+        if not chunk:
+            return
+
+
+def iter_day_records(path, read_bytes=READ_BYTES):
+    """Stream the day records of the `$_json` array in a report file, one dict at a time.
+
+    The file is memory-mapped and decoded `read_bytes` at a time, so only the
+    current window and one record are held in memory. The array boundary is
+    found by `iter_json_array`, like the in-memory fallback. Raises
+    ValueError when the file has no `$_json` array or it is malformed.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = mm.find(JSON_PREFIX.encode())
+        if start == -1:
+            raise ValueError("Could not find $_json variable in the file.")
+        yield from iter_json_array(_read_text(mm, start + len(JSON_PREFIX), read_bytes))
+
+
+class ColumnStoreWriter:
+    """Appends batches of `build_columns` output to one binary file per column.
+
+    Date and strategy codes are local to each batch; they are remapped to
+    store-wide codes before writing.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.dates = []
+        self.date_codes = {}
+        self.strategies = []
+        self.strategy_codes = {}
+        self.n_days = 0
+        self.n_setups = 0
+
+    def _codes(self, values, codes, names):
+        for value in values:
+            if value not in codes:
+                codes[value] = len(names)
+                names.append(value)
+        return np.array([codes[value] for value in values], dtype=np.int32)
+
+    def _write(self, name, values, dtype):
+        with open(os.path.join(self.directory, f'{name}.bin'), 'ab') as f:
+            np.asarray(values, dtype=dtype).tofile(f)
+
+    def append(self, columns):
+        date_codes = self._codes(columns['dates'], self.date_codes, self.dates)
+        strategy_codes = self._codes(columns['strategies'], self.strategy_codes, self.strategies)
+        columns = dict(columns)
+        columns['day_date'] = date_codes[columns['day_date']]
+        columns['setup_strategy'] = strategy_codes[columns['setup_strategy']]
+        columns['setup_day'] = columns['setup_day'] + self.n_days
+
+        for name, dtype in {**DAY_COLUMNS, **SETUP_COLUMNS}.items():
+            self._write(name, columns[name], dtype)
+        self.n_days += len(columns['day_pnl'])
+        self.n_setups += len(columns['setup_pnl'])
+
+    def close(self):
+        self._write('date_values', parse_dates(self.dates), 'datetime64[ns]')
+        meta = {
+            'n_days': self.n_days,
+            'n_setups': self.n_setups,
+            'dates': self.dates,
+            'strategies': self.strategies,
+        }
+        with open(os.path.join(self.directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+
+def _memmap(directory, name, dtype, length):
+    if length == 0:
+        # mmap cannot map an empty file
+        return np.empty(0, dtype=dtype)
+    return np.memmap(os.path.join(directory, f'{name}.bin'), dtype=dtype, mode='r', shape=(length,))
+
+
+def open_store(directory):
+    """Open a column store written by `ColumnStoreWriter` as a memory-mapped `DiskReport`."""
+    with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+
+    report = DiskReport(
+        dates=np.array(meta['dates'], dtype=object),
+        date_values=_memmap(directory, 'date_values', 'datetime64[ns]', len(meta['dates'])),
+        strategies=np.array(meta['strategies'], dtype=object),
+    )
+    for name, dtype in DAY_COLUMNS.items():
+        report[name] = _memmap(directory, name, dtype, meta['n_days'])
+    for name, dtype in SETUP_COLUMNS.items():
+        report[name] = _memmap(directory, name, dtype, meta['n_setups'])
+    return report
+
+
+def ingest(path, directory, batch_setups=BATCH_SETUPS, batch_days=BATCH_DAYS):
+    """Stream a report file into a column store in `directory`; returns its `DiskReport`."""
+    writer = ColumnStoreWriter(directory)
+    batch = []
+    setups = 0
+    for record in iter_day_records(path):
+        batch.append(record)
+        setups += len(record.get('LR') or [])
+        if setups >= batch_setups or len(batch) >= batch_days:
+            writer.append(build_columns(batch))
+            batch = []
+            setups = 0
+    if batch:
+        writer.append(build_columns(batch))
+    writer.close()
+    return open_store(directory)
+
+
+def server_reports(directory=REPORT_DIR):
+    """Names of the report files in `directory`, or an empty list when it is not set."""
+    if not directory or not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if name.lower().endswith(('.htm', '.html')))
+
+
+def load_columns(fileobj, out_of_core_bytes=OUT_OF_CORE_MB * 1024 * 1024):
+    """Columnar report for an uploaded or opened file, out of core when it is large.
+
+    Small files are decoded in memory with `parse_backtest_columns`. Larger
+    ones are streamed into a column store in a temporary directory and
+    memory-mapped, so decoding never holds the whole report. Uploads are
+    spooled to that directory first; files opened from disk are read in
+    place. Returns None when the report cannot be parsed.
+    """
+    size = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(0)
+    if size <= out_of_core_bytes:
+        return parse_backtest_columns(fileobj.read())
+
+    directory = tempfile.mkdtemp(prefix='backtest-')
+    try:
+        if isinstance(fileobj, io.BufferedReader):
+            report = ingest(fileobj.name, directory)
+        else:
+            path = spool(fileobj, directory)
+            report = ingest(path, directory)
+            os.remove(path)
+    except BaseException as error:
+        # Never leave a spooled copy of the upload behind
+        shutil.rmtree(directory, ignore_errors=True)
+        if isinstance(error, ValueError):
+            return None
+        raise
+    weakref.finalize(report, shutil.rmtree, directory, True)
+    return report
@@ -0,0 +1,275 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import skew, kurtosis
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+# Setups processed per step by the setup-level passes
+CHUNK_ROWS = 1_000_000
+
+
+def day_mask(report, start=None, end=None, exclude=None, vix_range=None, weekdays=None):
+    """Boolean mask over the report's days for the what-if filters.
+
+    `start`/`end` keep an inclusive date range and `exclude` drops one, given
+    as a (start, end) pair; `vix_range` keeps days whose mean setup `VST` lies
+    in [low, high]; `weekdays` keeps days whose weekday (0 = Monday) is listed.
+    Filters left as None are not applied. Days with an unparsable date are
+    dropped by any date or weekday filter.
+    """
+    mask = np.ones(len(report['day_pnl']), dtype=bool)
+    day_dates = report['date_values'][report['day_date']]
+
+    if start is not None:
+        mask &= day_dates >= np.datetime64(start, 'ns')
+    if end is not None:
+        mask &= day_dates <= np.datetime64(end, 'ns')
+    if exclude is not None:
+        excluded = (day_dates >= np.datetime64(exclude[0], 'ns')) & (day_dates <= np.datetime64(exclude[1], 'ns'))
+        mask &= ~excluded & ~np.isnat(day_dates)
+    if vix_range is not None:
+        vix = report['day_vix']
+        mask &= (vix >= vix_range[0]) & (vix <= vix_range[1])
+    if weekdays is not None:
+        weekday = pd.DatetimeIndex(day_dates).dayofweek.to_numpy()
+        mask &= np.isin(weekday, list(weekdays)) & ~np.isnat(day_dates)
+    return mask
+
+
+def iter_setups(report, mask=None, strategies=None, chunk_rows=CHUNK_ROWS):
+    """Yield (day, strategy, pnl) arrays of the selected setups, `chunk_rows` setups at a time.
+
+    Only one chunk of the setup columns is materialized at once, so this
+    works the same on in-memory arrays and on memory-mapped on-disk columns.
+    """
+    codes = None
+    if strategies is not None:
+        codes = np.flatnonzero(np.isin(report['strategies'], list(strategies)))
+    for start in range(0, len(report['setup_day']), chunk_rows):
+        chunk = slice(start, start + chunk_rows)
+        day = np.asarray(report['setup_day'][chunk])
+        strategy = np.asarray(report['setup_strategy'][chunk])
+        pnl = np.asarray(report['setup_pnl'][chunk])
+        keep = np.ones(len(day), dtype=bool) if mask is None else mask[day]
+        if codes is not None:
+            keep &= np.isin(strategy, codes)
+        yield day[keep], strategy[keep], pnl[keep]
+
+
+def strategy_daily_pnl(report, mask=None, strategies=None, chunk_rows=CHUNK_ROWS):
+    """Per-strategy daily PnL as a (strategies x dates) matrix.
+
+    Returns the summed setup PnL and a boolean matrix of the (strategy, date)
+    cells that had at least one setup, i.e. the days each strategy traded.
+    Sums and counts are accumulated chunk by chunk, so memory is bounded by
+    the matrix size rather than the number of setups.
+    """
+    n_strategies = len(report['strategies'])
+    n_dates = len(report['dates'])
+    size = n_strategies * n_dates
+    day_date = np.asarray(report['day_date'])
+
+    pnl_matrix = np.zeros(size)
+    setups = np.zeros(size, dtype=np.int64)
+    for day, strategy, pnl in iter_setups(report, mask, strategies, chunk_rows):
+        cell = strategy.astype(np.int64) * n_dates + day_date[day]
+        pnl_matrix += np.bincount(cell, weights=pnl, minlength=size)
+        setups += np.bincount(cell, minlength=size)
+    return pnl_matrix.reshape(n_strategies, n_dates), setups.reshape(n_strategies, n_dates) > 0
+
+
+def strategy_metrics(strategy, daily_pnls_np):
+    """Strategy Analysis row for one strategy's daily PnL series."""
+    total_strat_pnl = np.sum(daily_pnls_np)
+    days_traded = len(daily_pnls_np)
+    winning_days = np.sum(daily_pnls_np > 0)
+
+    win_rate = (winning_days / days_traded * 100) if days_traded > 0 else 0
+    avg_daily_pnl = total_strat_pnl / days_traded if days_traded > 0 else 0
+
+    max_loss_day_strat = np.min(daily_pnls_np) if days_traded > 0 else 0
+    max_profit_day_strat = np.max(daily_pnls_np) if days_traded > 0 else 0
+
+    # Financial Ratios Calculations
+    std_dev_daily = np.std(daily_pnls_np, ddof=1) if days_traded > 1 else 0
+    std_dev_annualized = std_dev_daily * np.sqrt(252)
+
+    skew_val = skew(daily_pnls_np) if days_traded > 1 else 0
+    kurt_val = kurtosis(daily_pnls_np) if days_traded > 1 else 0
+
+    # VaR and CVaR (Historical Method)
+    if days_traded > 0:
+        var_5 = np.percentile(daily_pnls_np, 5)
+        var_1 = np.percentile(daily_pnls_np, 1)
+        cvar_5 = daily_pnls_np[daily_pnls_np <= var_5].mean() if len(daily_pnls_np[daily_pnls_np <= var_5]) > 0 else var_5
+    else:
+        var_5 = var_1 = cvar_5 = 0
+
+    # Drawdown Calculations
+    cumulative_pnl = np.cumsum(daily_pnls_np)
+    running_max = np.maximum.accumulate(cumulative_pnl)
+    drawdowns = running_max - cumulative_pnl
+
+    max_drawdown = np.max(drawdowns) if len(drawdowns) > 0 else 0
+    avg_drawdown = np.mean(drawdowns[drawdowns > 0]) if np.any(drawdowns > 0) else 0
+
+    # Ulcer Index
+    if days_traded > 0:
+        squared_drawdowns = np.square(drawdowns)
+        ulcer_index = np.sqrt(np.mean(squared_drawdowns))
+    else:
+        ulcer_index = 0
+
+    time_in_drawdown = (np.sum(drawdowns > 0) / days_traded * 100) if days_traded > 0 else 0
+
+    # Ratios (Assuming Risk Free Rate = 0 for Sharpe/Sortino on PnL)
+    sharpe_ratio = (avg_daily_pnl / std_dev_daily * np.sqrt(252)) if std_dev_daily > 0 else 0
+
+    downside_returns = daily_pnls_np[daily_pnls_np < 0]
+    downside_std = np.std(downside_returns, ddof=1) if len(downside_returns) > 1 else 0
+    sortino_ratio = (avg_daily_pnl / downside_std * np.sqrt(252)) if downside_std > 0 else 0
+
+    calmar_ratio = (total_strat_pnl / max_drawdown) if max_drawdown > 0 else 0
+    sterling_ratio = (total_strat_pnl / (max_drawdown + 0.1 * max_drawdown)) if max_drawdown > 0 else 0
+
+    pain_index = np.mean(np.abs(drawdowns)) if days_traded > 0 else 0
+    pain_ratio = (total_strat_pnl / pain_index) if pain_index > 0 else 0
+
+    sum_wins = np.sum(daily_pnls_np[daily_pnls_np > 0])
+    sum_losses = np.abs(np.sum(daily_pnls_np[daily_pnls_np < 0]))
+
+    gain_to_pain_ratio = (np.sum(daily_pnls_np) / np.abs(np.sum(daily_pnls_np[daily_pnls_np < 0]))) if np.sum(daily_pnls_np[daily_pnls_np < 0]) != 0 else 0
+
+    profit_factor = (sum_wins / sum_losses) if sum_losses > 0 else 0
+
+    # Avg Rolling Sharpe (6m) - Assuming ~126 trading days
+    window = 126
+    if days_traded >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(daily_pnls_np, window)
+        window_mean = windows.mean(axis=1)
+        window_std = windows.std(axis=1, ddof=1)
+        valid = window_std > 0
+        rolling_sharpes = window_mean[valid] / window_std[valid] * np.sqrt(252)
+        avg_rolling_sharpe = np.mean(rolling_sharpes) if len(rolling_sharpes) > 0 else 0
+    else:
+        avg_rolling_sharpe = 0
+
+    # CDaR (5%) - Conditional Drawdown at Risk
+    if len(drawdowns) > 0:
+        worst_drawdowns = np.sort(drawdowns)[::-1] # Descending
+        cutoff_index = int(np.ceil(len(worst_drawdowns) * 0.05))
+        cdar_5 = np.mean(worst_drawdowns[:cutoff_index]) if cutoff_index > 0 else 0
+    else:
+        cdar_5 = 0
+
+    return {
+        "Strategy": strategy,
+        "Total PNL": total_strat_pnl,
+        "Days": days_traded,
+        "Win Rate": f"{win_rate:.1f}%",
+        "Avg Daily": avg_daily_pnl,
+        "Max Loss (Day)": max_loss_day_strat,
+        "Max Profit (Day)": max_profit_day_strat,
+        "Std Dev (Daily)": std_dev_daily,
+        "Std Dev (Ann)": std_dev_annualized,
+        "Skewness": skew_val,
+        "Kurtosis": kurt_val,
+        "VaR (5%)": var_5,
+        "VaR (1%)": var_1,
+        "CVaR (5%)": cvar_5,
+        "Max Drawdown": max_drawdown,
+        "Avg Drawdown": avg_drawdown,
+        "Ulcer Index": ulcer_index,
+        "Time in DD %": f"{time_in_drawdown:.1f}%",
+        "Sharpe Ratio": sharpe_ratio,
+        "Sortino Ratio": sortino_ratio,
+        "Calmar Ratio": calmar_ratio,
+        "Sterling Ratio": sterling_ratio,
+        "Pain Ratio": pain_ratio,
+        "Gain-to-Pain": gain_to_pain_ratio,
+        "Profit Factor": profit_factor,
+        "Avg Roll Sharpe (6m)": avg_rolling_sharpe,
+        "CDaR (5%)": cdar_5
+    }
+
+
+def strategy_table(strategies, pnl_matrix, traded):
+    strategy_data = [
+        strategy_metrics(strategy, pnl_matrix[i][traded[i]])
+        for i, strategy in enumerate(strategies)
+        if traded[i].any()
+    ]
+    return pd.DataFrame(strategy_data)
+
+
+def summary_metrics(dates, daily_pnl, trades):
+    """Overall metrics for the selected days (`dates`, `daily_pnl`, `trades` aligned)."""
+    total_days = len(daily_pnl)
+    total_pnl = float(np.sum(daily_pnl))
+    win_days = int(np.sum(daily_pnl > 0))
+    loss_days = int(np.sum(daily_pnl < 0))
+
+    if total_days > 0:
+        best, worst = np.argmax(daily_pnl), np.argmin(daily_pnl)
+        max_profit_day = {'date': dates[best], 'pnl': daily_pnl[best]}
+        max_loss_day = {'date': dates[worst], 'pnl': daily_pnl[worst]}
+    else:
+        max_profit_day = {'date': '', 'pnl': -float('inf')}
+        max_loss_day = {'date': '', 'pnl': float('inf')}
+
+    return {
+        "Total Days": total_days,
+        "Total PNL": total_pnl,
+        "Total Trades": int(np.sum(trades)),
+        "Win Days": win_days,
+        "Loss Days": loss_days,
+        "Win Rate (Days)": f"{win_days / total_days * 100:.2f}%" if total_days > 0 else "N/A",
+        "Max Profit Day": f"{max_profit_day['date']} ({max_profit_day['pnl']:.2f})",
+        "Max Loss Day": f"{max_loss_day['date']} ({max_loss_day['pnl']:.2f})",
+        "Avg PNL per Day": total_pnl / total_days if total_days > 0 else 0
+    }
+
+
+def analyze_columns(report, mask=None, strategies=None):
+    """Daily summary, Strategy Analysis table and overall metrics of a columnar report.
+
+    `mask` selects days (see `day_mask`) and `strategies` restricts the
+    analysis to a subset of strategy groups. Daily PnL is the report's `DP`,
+    except under a strategy subset: `DP` covers every strategy, so the day's
+    PnL is then the sum of the selected setups and days where none of them
+    traded are left out.
+    """
+    n_days = len(report['day_pnl'])
+    days = np.ones(n_days, dtype=bool) if mask is None else mask.copy()
+
+    if strategies is not None:
+        trades = np.zeros(n_days, dtype=np.int64)
+        sum_pnl = np.zeros(n_days)
+        for day, _, pnl in iter_setups(report, days, strategies):
+            trades += np.bincount(day, minlength=n_days)
+            sum_pnl += np.bincount(day, weights=pnl, minlength=n_days)
+        daily_pnl = sum_pnl
+        days &= trades > 0
+    else:
+        trades = np.asarray(report['day_trades'])
+        sum_pnl = np.asarray(report['day_sum_pnl'])
+        daily_pnl = np.asarray(report['day_pnl'])
+
+    date_codes = report['day_date'][days]
+    dates = report['dates'][date_codes]
+    daily_pnl, sum_pnl, trades = daily_pnl[days], sum_pnl[days], trades[days]
+
+    # Parsed dates sort chronologically; the raw RD string is kept alongside
+    daily_df = pd.DataFrame({
+        "Date": report['date_values'][date_codes],
+        "RD": dates,
+        "Daily PNL": daily_pnl,
+        "Sum PNL": sum_pnl,
+        "Trades": trades,
+        "Result": np.select([daily_pnl > 0, daily_pnl < 0], ["WIN", "LOSS"], "BREAK"),
+    })
+
+    pnl_matrix, traded = strategy_daily_pnl(report, days, strategies)
+    strategy_df = strategy_table(report['strategies'], pnl_matrix, traded)
+
+    return daily_df, strategy_df, summary_metrics(dates, daily_pnl, trades)
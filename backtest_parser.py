@@ -0,0 +1,275 @@
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# Preferred decoding backends, fastest first. The stdlib json module is always
+# available and is used when neither optional parser is installed.
+JSON_BACKENDS = ('simdjson', 'orjson', 'json')
+
+JSON_PREFIX = 'let $_json = ['
+JSON_SUFFIX = '];'
+
+# A single day record larger than this is treated as a malformed report
+MAX_RECORD_CHARS = 256 * 1024 * 1024
+
+
+def _load_json(raw):
+    # The C scanner memoizes object keys for the duration of a single call,
+    # so the repeated RD/DP/LR/... keys share one string object each.
+    return json.loads(raw)
+
+
+def _load_orjson(raw):
+    return orjson.loads(raw)
+
+
+def _load_simdjson(raw):
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    # A fresh parser per document: reusing one would invalidate the proxies
+    # returned for a previous report.
+    return simdjson.Parser().parse(raw)
+
+
+_LOADERS = {
+    'json': _load_json,
+    'orjson': _load_orjson,
+    'simdjson': _load_simdjson,
+}
+
+
+def available_backends():
+    installed = {'json': True, 'orjson': orjson is not None, 'simdjson': simdjson is not None}
+    return [name for name in JSON_BACKENDS if installed[name]]
+
+
+def resolve_backend(backend=None):
+    if backend is None:
+        return available_backends()[0]
+    if backend not in _LOADERS:
+        raise ValueError(f"Unknown JSON backend: {backend!r} (expected one of {', '.join(JSON_BACKENDS)})")
+    if backend not in available_backends():
+        raise ValueError(f"JSON backend {backend!r} is not installed")
+    return backend
+
+
+def extract_json(content):
+    """Return the `$_json` array literal from a report, as str or bytes like `content`.
+
+    Matches up to the first `];` after `let $_json = [`. Plain substring
+    searches are much faster than a non-greedy regex on large reports. A `];`
+    inside a string value cuts the slice short; `_decode` then falls back to
+    `iter_json_array`.
+    """
+    prefix, suffix = JSON_PREFIX, JSON_SUFFIX
+    if not isinstance(content, str):
+        prefix, suffix = prefix.encode(), suffix.encode()
+    start = content.find(prefix)
+    if start == -1:
+        return None
+    start += len(prefix) - 1
+    end = content.find(suffix, start)
+    if end == -1:
+        return None
+    return content[start:end + 1]
+
+
+def iter_json_array(chunks):
+    """Yield the records of a `$_json` array literal read from text `chunks`.
+
+    `chunks` is an iterable of str pieces starting right after the opening
+    `[`. The array ends at its own closing `]`, which must be followed by
+    `;`, so a `];` inside a string value is not taken for the end. Only the
+    current piece and one record are buffered. Raises ValueError when the
+    array is malformed or unterminated.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ''
+    index = 0
+    eof = False
+
+    while True:
+        while index < len(buffer) and buffer[index] in ' \t\r\n,':
+            index += 1
+        if buffer.startswith(JSON_SUFFIX, index):
+            return
+        try:
+            if index == len(buffer) or buffer.startswith(']', index):
+                # End of the piece, or a `]` whose `;` has not been read yet
+                raise json.JSONDecodeError("Need more data", buffer, index)
+            record, index = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("Unterminated $_json array")
+            if len(buffer) - index > MAX_RECORD_CHARS:
+                raise ValueError("Malformed $_json day record")
+            chunk = next(chunks, None)
+            eof = chunk is None
+            buffer = buffer[index:] + (chunk or '')
+            index = 0
+            continue
+        yield record
+
+
+def _decode(content, backend):
+    json_str = extract_json(content)
+    if json_str is None:
+        return None
+    try:
+        return _LOADERS[backend](json_str)
+    except ValueError:
+        # json.JSONDecodeError, orjson.JSONDecodeError and simdjson errors
+        # are all ValueError subclasses.
+        pass
+
+    # The first `];` may sit inside a string value: find the array's real end
+    # the same way the out-of-core reader does, with the stdlib decoder.
+    try:
+        text = content if isinstance(content, str) else bytes(content).decode('utf-8')
+        start = text.find(JSON_PREFIX) + len(JSON_PREFIX)
+        return list(iter_json_array([text[start:]]))
+    except ValueError:
+        return None
+
+
+def parse_backtest_data(content, backend=None):
+    """Decode the day records of a backtest report into Python objects.
+
+    `content` may be the report as str or raw bytes; bytes skip a full-size
+    utf-8 decode. Returns None when the report has no parsable `$_json`.
+    """
+    backend = resolve_backend(backend)
+    data = _decode(content, backend)
+    if data is None:
+        return None
+    if hasattr(data, 'as_list'):
+        # simdjson proxy, unless the stdlib fallback in `_decode` was used
+        return data.as_list()
+    return data
+
+
+def parse_backtest_columns(content, backend=None):
+    """Decode a backtest report straight into columnar arrays.
+
+    With the simdjson backend only the fields the analysis needs are pulled
+    out of the parsed document; the full tree of dicts is never built.
+    """
+    backend = resolve_backend(backend)
+    data = _decode(content, backend)
+    if data is None:
+        return None
+    return build_columns(data)
+
+
+def parse_dates(dates):
+    """Parse `RD` strings into datetime64 values; unparsable dates become NaT.
+
+    ISO dates are tried first, anything else is parsed day-first (dd-mm-yyyy).
+    """
+    dates = pd.Series(dates, dtype=object)
+    parsed = pd.to_datetime(dates, errors='coerce', format='ISO8601')
+    missing = parsed.isna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(dates[missing], errors='coerce', dayfirst=True, format='mixed')
+    return parsed.to_numpy(dtype='datetime64[ns]')
+
+
+def build_columns(records):
+    """Flatten day records into day-level and setup-level numpy arrays.
+
+    Dates and strategy groups (first 5 chars of `ON`) are stored once in
+    `dates` / `strategies` and referenced by integer codes, in order of first
+    appearance. `date_values` holds the parsed dates, `day_vix` the mean
+    `VST` of each day's setups that have one (NaN on days without any);
+    a missing `VST` is NaN in `setup_vix`.
+    """
+    dates = []
+    date_codes = {}
+    strategies = []
+    strategy_codes = {}
+
+    day_date = []
+    day_pnl = []
+    day_trades = []
+    day_sum_pnl = []
+
+    setup_day = []
+    setup_strategy = []
+    setup_pnl = []
+    setup_max = []
+    setup_min = []
+    setup_vix = []
+    setup_sl_hit = []
+
+    for day_index, day_data in enumerate(records):
+        date = day_data.get('RD', 'Unknown')
+        date_code = date_codes.get(date)
+        if date_code is None:
+            date_code = date_codes[date] = len(dates)
+            dates.append(sys.intern(date) if isinstance(date, str) else date)
+
+        num_trades = 0
+        sum_pnl = 0
+        for trade_setup in day_data.get('LR') or []:
+            group_key = trade_setup.get('ON', 'Unknown')[:5]
+            strategy_code = strategy_codes.get(group_key)
+            if strategy_code is None:
+                strategy_code = strategy_codes[group_key] = len(strategies)
+                strategies.append(sys.intern(group_key))
+
+            pnl = trade_setup.get('PNL') or 0
+            sum_pnl += pnl
+            num_trades += 1
+
+            setup_day.append(day_index)
+            setup_strategy.append(strategy_code)
+            setup_pnl.append(pnl)
+            setup_max.append(trade_setup.get('_max') or 0)
+            setup_min.append(trade_setup.get('_min') or 0)
+            vix = trade_setup.get('VST')
+            setup_vix.append(np.nan if vix is None else vix)
+            setup_sl_hit.append(any('OnSL' in str(leg.get('Er') or '') for leg in trade_setup.get('LD') or []))
+
+        day_date.append(date_code)
+        day_pnl.append(day_data.get('DP') or 0)
+        day_trades.append(num_trades)
+        day_sum_pnl.append(sum_pnl)
+
+    setup_day = np.array(setup_day, dtype=np.int32)
+    setup_vix = np.array(setup_vix, dtype=np.float64)
+    # Setups without a VST are left out of their day's mean
+    has_vix = ~np.isnan(setup_vix)
+    vix_sum = np.bincount(setup_day[has_vix], weights=setup_vix[has_vix], minlength=len(day_date))
+    with np.errstate(invalid='ignore'):
+        day_vix = vix_sum / np.bincount(setup_day[has_vix], minlength=len(day_date))
+
+    return {
+        'dates': np.array(dates, dtype=object),
+        'date_values': parse_dates(dates),
+        'strategies': np.array(strategies, dtype=object),
+        'day_date': np.array(day_date, dtype=np.int32),
+        'day_pnl': np.array(day_pnl, dtype=np.float64),
+        'day_trades': np.array(day_trades, dtype=np.int32),
+        'day_sum_pnl': np.array(day_sum_pnl, dtype=np.float64),
+        'day_vix': day_vix,
+        'setup_day': setup_day,
+        'setup_strategy': np.array(setup_strategy, dtype=np.int32),
+        'setup_pnl': np.array(setup_pnl, dtype=np.float64),
+        'setup_max': np.array(setup_max, dtype=np.float64),
+        'setup_min': np.array(setup_min, dtype=np.float64),
+        'setup_vix': setup_vix,
+        'setup_sl_hit': np.array(setup_sl_hit, dtype=bool),
+    }
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from backtest_metrics import WEEKDAYS, strategy_daily_pnl
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Weekly index expiry; expiry weeks run from the day after one expiry to the next
+EXPIRY_WEEKDAY = 'Thu'
+
+
+def strategy_day_frame(report, mask=None, strategies=None):
+    """Long frame of (Strategy, Date, PNL), one row per day each strategy traded.
+
+    Days whose `RD` could not be parsed into a date are left out, since they
+    cannot be placed in any period.
+    """
+    pnl_matrix, traded = strategy_daily_pnl(report, mask, strategies)
+    strategy_idx, date_idx = np.nonzero(traded)
+    frame = pd.DataFrame({
+        "Strategy": pd.Categorical.from_codes(strategy_idx, categories=report['strategies']),
+        "Date": report['date_values'][date_idx],
+        "PNL": pnl_matrix[strategy_idx, date_idx],
+    })
+    return frame[frame["Date"].notna()]
+
+
+def period_pnl(frame, freq, label="Period"):
+    """PnL of every strategy per period of `freq` (a pandas period alias), plus a Total column."""
+    periods = frame["Date"].dt.to_period(freq)
+    table = frame.groupby([periods.rename(label), "Strategy"], observed=True)["PNL"].sum().unstack("Strategy", fill_value=0)
+    table.columns = table.columns.astype(str)
+    table.columns.name = None
+    table["Total"] = table.sum(axis=1)
+    return table
+
+
+def monthly_grid(frame):
+    """Strategy x Year rows with one PnL column per month and a yearly Total."""
+    dates = frame["Date"].dt
+    grid = frame.groupby(["Strategy", dates.year.rename("Year"), dates.month.rename("Month")], observed=True)["PNL"].sum()
+    grid = grid.unstack("Month").reindex(columns=range(1, 13))
+    grid.columns = MONTHS
+    grid["Total"] = grid.sum(axis=1)
+    return grid
+
+
+def yearly_pnl(frame):
+    table = period_pnl(frame, 'Y', "Year")
+    table.index = table.index.year
+    return table
+
+
+def expiry_week_pnl(frame, expiry_weekday=EXPIRY_WEEKDAY):
+    """PnL per strategy per expiry week, labelled by the expiry date ending the week."""
+    table = period_pnl(frame, f"W-{expiry_weekday.upper()}", "Expiry Week")
+    table.index = table.index.end_time.date
+    table.index.name = "Expiry Week"
+    return table
+
+
+def weekday_stats(frame):
+    """Daily PnL stats of every strategy per day of the week."""
+    weekday = frame["Date"].dt.dayofweek.rename("Weekday")
+    grouped = frame.assign(Win=frame["PNL"] > 0).groupby(["Strategy", weekday], observed=True)
+    stats = grouped.agg(
+        **{
+            "Total PNL": ("PNL", "sum"),
+            "Days": ("PNL", "size"),
+            "Win Days": ("Win", "sum"),
+            "Avg Daily": ("PNL", "mean"),
+            "Max Loss (Day)": ("PNL", "min"),
+            "Max Profit (Day)": ("PNL", "max"),
+        }
+    )
+    stats.insert(2, "Win Rate", (stats.pop("Win Days") / stats["Days"] * 100).map(lambda rate: f"{rate:.1f}%"))
+    stats.index = stats.index.set_levels(stats.index.levels[1].map(lambda day: WEEKDAYS[day]), level="Weekday")
+    return stats
+
+
+def period_tables(report, mask=None, strategies=None, expiry_weekday=EXPIRY_WEEKDAY):
+    """All period breakdowns for the selected days and strategies, keyed by sheet name."""
+    frame = strategy_day_frame(report, mask, strategies)
+    return {
+        "Monthly PnL": monthly_grid(frame),
+        "Yearly PnL": yearly_pnl(frame),
+        "Weekday Stats": weekday_stats(frame),
+        "Expiry Week PnL": expiry_week_pnl(frame, expiry_weekday),
+    }
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from backtest_parser import (
+    JSON_BACKENDS,
+    available_backends,
+    build_columns,
+    extract_json,
+    parse_backtest_columns,
+    parse_backtest_data,
+)
+from backtest_metrics import analyze_columns, day_mask
+from backtest_periods import period_tables
+from backtest_disk import ingest
+
+
+def best_of(repeat, func, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def benchmark_parse(file_path, backends, repeat):
+    with open(file_path, 'rb') as f:
+        content = f.read()
+
+    extract_ms, _ = best_of(repeat, extract_json, content)
+    print(f"\n{os.path.basename(file_path)} ({len(content) / 1e6:.1f} MB), extract $_json: {extract_ms:.1f} ms")
+
+    results = []
+    for backend in backends:
+        tree_ms, data = best_of(repeat, parse_backtest_data, content, backend)
+        if data is None:
+            print(f"{backend}: could not parse report")
+            continue
+        cols_ms, _ = best_of(repeat, build_columns, data)
+        columnar_ms, _ = best_of(repeat, parse_backtest_columns, content, backend)
+        results.append((backend, tree_ms, tree_ms + cols_ms, columnar_ms))
+
+    # Speedup of the columnar decode, relative to stdlib json when it was measured
+    baseline = next((r[3] for r in results if r[0] == 'json'), None)
+
+    print(f"{'Backend':<10} | {'Tree (ms)':>10} | {'Tree+Cols (ms)':>14} | {'Columnar (ms)':>13} | {'Speedup':>7}")
+    print("-" * 67)
+    for backend, tree_ms, tree_cols_ms, columnar_ms in results:
+        speedup = f"{baseline / columnar_ms:.2f}x" if baseline else "-"
+        print(f"{backend:<10} | {tree_ms:>10.1f} | {tree_cols_ms:>14.1f} | {columnar_ms:>13.1f} | {speedup:>7}")
+
+    if results:
+        benchmark_analysis(parse_backtest_columns(content, results[0][0]), repeat)
+    benchmark_out_of_core(file_path)
+
+
+def benchmark_analysis(report, repeat):
+    full_ms, _ = best_of(repeat, analyze_columns, report)
+    # A typical what-if: skip Thursdays (weekly expiry) and restrict to the first strategy
+    mask_ms, mask = best_of(repeat, lambda: day_mask(report, weekdays=[0, 1, 2, 4]))
+    whatif_ms, _ = best_of(repeat, analyze_columns, report, mask, report['strategies'][:1])
+    periods_ms, _ = best_of(repeat, period_tables, report)
+    print(f"Analysis: full {full_ms:.1f} ms, what-if re-evaluation {mask_ms + whatif_ms:.1f} ms, "
+          f"period tables {periods_ms:.1f} ms")
+
+
+def benchmark_out_of_core(file_path):
+    with tempfile.TemporaryDirectory(prefix='backtest-') as directory:
+        start = time.perf_counter()
+        report = ingest(file_path, directory)
+        ingest_ms = (time.perf_counter() - start) * 1000
+        analysis_ms, _ = best_of(1, analyze_columns, report)
+        print(f"Out of core: ingest {ingest_ms:.1f} ms, analysis {analysis_ms:.1f} ms")
+        del report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark backtest report decoding backends.")
+    parser.add_argument('files', nargs='+', help="Backtest report HTML files")
+    parser.add_argument('--backend', action='append', choices=JSON_BACKENDS,
+                        help="Backend to benchmark (repeatable); defaults to all installed")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement, best is reported")
+    args = parser.parse_args(argv)
+
+    backends = args.backend or available_backends()
+    missing = [b for b in backends if b not in available_backends()]
+    if missing:
+        print(f"Not installed: {', '.join(missing)}")
+        backends = [b for b in backends if b not in missing]
+
+    for file_path in args.files:
+        if not os.path.exists(file_path):
+            print(f"File not found: {file_path}")
+            continue
+        benchmark_parse(file_path, backends, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
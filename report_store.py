@@ -0,0 +1,189 @@
+import os
+import sys
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from backtest_parser import parse_backtest_columns
+
+# Memory budget for parsed reports no session is using, in MB
+DEFAULT_BUDGET_MB = int(os.environ.get('BACKTEST_STORE_MB', 1024))
+
+
+def content_key(content, chunk_bytes=16 * 1024 * 1024):
+    """SHA-256 of raw bytes or of a binary file object, read in chunks."""
+    if isinstance(content, (bytes, bytearray)):
+        return hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in iter(lambda: content.read(chunk_bytes), b''):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def report_nbytes(report):
+    """Approximate memory held by a columnar report's arrays.
+
+    Memory-mapped columns are not counted; their pages belong to the OS page
+    cache and are reclaimed under memory pressure.
+    """
+    total = 0
+    for values in report.values():
+        if not isinstance(values, np.memmap):
+            total += values.nbytes
+        if values.dtype == object:
+            total += sum(sys.getsizeof(value) for value in values)
+    return total
+
+
+def report_disk_nbytes(report):
+    """Bytes of a report's memory-mapped columns, i.e. its on-disk store."""
+    return sum(values.nbytes for values in report.values() if isinstance(values, np.memmap))
+
+
+def freeze(report):
+    # Reports are shared between sessions, so nobody may modify them in place
+    for values in report.values():
+        values.flags.writeable = False
+    return report
+
+
+class ReportLease:
+    """A session's reference to a report in the store.
+
+    The reference is dropped by `release()` or, at the latest, when the lease
+    is garbage collected together with the session state holding it.
+    """
+
+    def __init__(self, store, key, report):
+        self.key = key
+        self.report = report
+        self._finalizer = weakref.finalize(self, store.release, key)
+
+    def release(self):
+        self._finalizer()
+
+
+class ReportStore:
+    """Process-wide store of parsed reports, shared by all Streamlit sessions.
+
+    Reports are keyed by the SHA-256 of the uploaded bytes, so sessions that
+    open the same file share one read-only copy. Entries are reference
+    counted; once the store exceeds its memory budget, the least recently
+    used reports that no session holds are evicted. Reports in use are never
+    evicted, even over budget. Out-of-core reports are evicted as soon as no
+    session holds them, so their on-disk stores do not pile up.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024, parse=parse_backtest_columns):
+        self.budget_bytes = budget_bytes
+        self._parse = parse
+        # Finalizers of garbage collected leases may call release() from
+        # inside a locked section, hence a reentrant lock.
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lease(self, content):
+        """Return a `ReportLease` for the report in `content`, parsing it at most once.
+
+        `content` is raw bytes or a binary file object, whichever the store's
+        `parse` function accepts.
+        """
+        key = content_key(content)
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        # Concurrent uploads of the same report wait for a single parse
+        try:
+            with loading:
+                report = self._acquire(key)
+                if report is None:
+                    report = self._parse(content)
+                    if report is not None:
+                        report = self._insert(key, freeze(report))
+        finally:
+            with self._lock:
+                # A later caller may already have registered a new lock
+                if self._loading.get(key) is loading:
+                    del self._loading[key]
+        return ReportLease(self, key, report)
+
+    def _acquire(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry['refs'] += 1
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['report']
+
+    def _insert(self, key, report):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Parsed concurrently by another caller: share its copy
+                entry['refs'] += 1
+                self._entries.move_to_end(key)
+                return entry['report']
+            self._entries[key] = {
+                'report': report,
+                'nbytes': report_nbytes(report),
+                'disk_nbytes': report_disk_nbytes(report),
+                'refs': 1,
+            }
+            self.misses += 1
+            self._evict()
+            return report
+
+    def get(self, key):
+        """Return the stored report for `key` without taking a reference, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry['report'] if entry is not None else None
+
+    def release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['refs'] = max(entry['refs'] - 1, 0)
+            self._evict()
+
+    def _evict(self):
+        total = sum(entry['nbytes'] for entry in self._entries.values())
+        for key, entry in list(self._entries.items()):
+            if entry['refs'] == 0 and entry['disk_nbytes'] > 0:
+                del self._entries[key]
+                total -= entry['nbytes']
+                self.evictions += 1
+        for key, entry in list(self._entries.items()):
+            if total <= self.budget_bytes:
+                break
+            if entry['refs'] == 0:
+                del self._entries[key]
+                total -= entry['nbytes']
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            return {
+                "Reports": len(entries),
+                "In Use": sum(1 for entry in entries if entry['refs'] > 0),
+                "Sessions": sum(entry['refs'] for entry in entries),
+                "Memory (MB)": sum(entry['nbytes'] for entry in entries) / 1024 / 1024,
+                "Budget (MB)": self.budget_bytes / 1024 / 1024,
+                "Disk (MB)": sum(entry['disk_nbytes'] for entry in entries) / 1024 / 1024,
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Evictions": self.evictions,
+            }
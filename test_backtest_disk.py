@@ -0,0 +1,96 @@
+import io
+import os
+import glob
+import json
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest_disk
+from backtest_disk import ingest, load_columns, server_reports
+from backtest_metrics import analyze_columns
+from backtest_parser import available_backends, parse_backtest_columns
+from test_backtest_metrics import RECORDS, REPORT_HTML
+
+# `];` inside a string value must not be taken for the end of the array
+TRICKY_RECORDS = json.loads(json.dumps(RECORDS))
+TRICKY_RECORDS[1]["LR"][0]["LD"][0]["Er"] = "OnSL x];y ü"
+TRICKY_HTML = f"<script>let $_json = {json.dumps(TRICKY_RECORDS)};\nlet other = [1];</script>"
+
+
+def assert_same_report(expected, actual):
+    assert expected.keys() == actual.keys()
+    for name in expected:
+        np.testing.assert_array_equal(np.asarray(expected[name]), np.asarray(actual[name]), err_msg=name)
+
+
+def test_ingest_matches_in_memory_columns(tmp_path):
+    path = tmp_path / "report.htm"
+    path.write_text(REPORT_HTML, encoding="utf-8")
+    disk = ingest(str(path), str(tmp_path), batch_days=3)
+    memory = parse_backtest_columns(REPORT_HTML)
+
+    assert_same_report(memory, disk)
+    for expected, actual in zip(analyze_columns(memory)[:2], analyze_columns(disk)[:2]):
+        pd.testing.assert_frame_equal(expected, actual)
+
+
+def test_ingest_flushes_batches_by_setup_count(tmp_path, monkeypatch):
+    path = tmp_path / "report.htm"
+    path.write_text(REPORT_HTML, encoding="utf-8")
+    batches = []
+    append = backtest_disk.ColumnStoreWriter.append
+    monkeypatch.setattr(backtest_disk.ColumnStoreWriter, "append",
+                        lambda writer, columns: batches.append(len(columns['setup_pnl'])) or append(writer, columns))
+
+    disk = ingest(str(path), str(tmp_path), batch_setups=3)
+    # Setups per day are 2, 2, 1, 3, 0, 1, 2, 2
+    assert batches == [4, 4, 3, 2]
+    assert_same_report(parse_backtest_columns(REPORT_HTML), disk)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_string_containing_array_end_parses_in_memory(backend):
+    report = parse_backtest_columns(TRICKY_HTML.encode(), backend)
+    assert report is not None
+    assert len(report['day_pnl']) == len(RECORDS)
+    assert report['setup_sl_hit'].sum() == 3
+
+
+def test_in_memory_and_out_of_core_agree_on_array_end():
+    content = TRICKY_HTML.encode()
+    memory = load_columns(io.BytesIO(content))
+    disk = load_columns(io.BytesIO(content), out_of_core_bytes=0)
+    assert_same_report(memory, disk)
+
+    truncated = content[:content.index(b"];\nlet other")]
+    assert load_columns(io.BytesIO(truncated)) is None
+    assert load_columns(io.BytesIO(truncated), out_of_core_bytes=0) is None
+
+
+def test_failed_out_of_core_load_removes_its_directory():
+    pattern = os.path.join(tempfile.gettempdir(), "backtest-*")
+    before = set(glob.glob(pattern))
+    with pytest.raises(AttributeError):
+        # Day records that are not objects fail in build_columns
+        load_columns(io.BytesIO(b"<script>let $_json = [1, 2];</script>"), out_of_core_bytes=0)
+    assert load_columns(io.BytesIO(b'<script>let $_json = [{"RD": "02-01-2023"}, {"RD"'), out_of_core_bytes=0) is None
+    assert set(glob.glob(pattern)) == before
+
+
+def test_files_on_disk_are_ingested_in_place(tmp_path, monkeypatch):
+    (tmp_path / "b.html").write_text(REPORT_HTML, encoding="utf-8")
+    (tmp_path / "a.htm").write_text(REPORT_HTML, encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+    assert server_reports(str(tmp_path)) == ["a.htm", "b.html"]
+    assert server_reports(None) == []
+
+    def spool(*args):
+        raise AssertionError("file was spooled")
+
+    monkeypatch.setattr(backtest_disk, "spool", spool)
+    with open(tmp_path / "a.htm", "rb") as f:
+        disk = load_columns(f, out_of_core_bytes=0)
+    assert_same_report(parse_backtest_columns(REPORT_HTML), disk)
@@ -0,0 +1,123 @@
+import json
+
+import pandas as pd
+import pytest
+
+from backtest_parser import available_backends, parse_backtest_columns
+from backtest_metrics import analyze_columns, day_mask
+
+
+def setup(on, pnl, er=None, vix=15.0):
+    return {"ON": on, "PNL": pnl, "_max": abs(pnl), "_min": -abs(pnl), "VST": vix, "LD": [{"Er": er, "PNL": pnl}]}
+
+
+DAYS = [
+    ("02-01-2023", [setup("NIFTY_a", 120.5, vix=14.0), setup("BNFxx_b", -40.0, "OnSL", 14.0)]),
+    ("03-01-2023", [setup("NIFTY_a", -75.25, "OnSL", 16.5), setup("NIFTY_c", 30.0, vix=16.5)]),
+    ("04-01-2023", [setup("BNFxx_b", 210.0, vix=18.0)]),
+    ("05-01-2023", [setup("NIFTY_a", -15.0, vix=19.5), setup("BNFxx_b", -60.0, vix=19.5), setup("FINNI_z", 5.0, vix=19.5)]),
+    ("06-01-2023", []),
+    ("09-01-2023", [setup("NIFTY_a", 300.0, vix=13.0)]),
+    ("10-01-2023", [setup("BNFxx_b", -125.5, "OnSL", 21.0), setup("NIFTY_a", 44.0, vix=21.0)]),
+    ("11-01-2023", [setup("FINNI_z", -10.0, vix=17.0), setup("NIFTY_a", 0.0, vix=17.0)]),
+]
+RECORDS = [{"RD": rd, "DP": round(sum(s["PNL"] for s in lr), 2), "LR": lr} for rd, lr in DAYS]
+REPORT_HTML = f"<html><script>let $_json = {json.dumps(RECORDS)};</script></html>"
+
+# Expected values below were produced by the original dict-based analyze_data
+# on the same records (and on the records without 05-01 and 06-01).
+FULL_DAILY = {
+    "RD": ["02-01-2023", "03-01-2023", "04-01-2023", "05-01-2023", "06-01-2023", "09-01-2023", "10-01-2023", "11-01-2023"],
+    "Daily PNL": [80.5, -45.25, 210.0, -70.0, 0.0, 300.0, -81.5, -10.0],
+    "Sum PNL": [80.5, -45.25, 210.0, -70.0, 0.0, 300.0, -81.5, -10.0],
+    "Trades": [2, 2, 1, 3, 0, 1, 2, 2],
+    "Result": ["WIN", "LOSS", "WIN", "LOSS", "BREAK", "WIN", "LOSS", "LOSS"],
+}
+FULL_METRICS = {
+    "Total Days": 8, "Total PNL": 383.75, "Total Trades": 13, "Win Days": 3, "Loss Days": 4,
+    "Win Rate (Days)": "37.50%", "Max Profit Day": "09-01-2023 (300.00)", "Max Loss Day": "10-01-2023 (-81.50)",
+    "Avg PNL per Day": 47.96875,
+}
+FULL_STRATEGIES = {
+    "Strategy": ["NIFTY", "BNFxx", "FINNI"],
+    "Total PNL": [404.25, -15.5, -5.0],
+    "Days": [6, 4, 2],
+    "Win Rate": ["50.0%", "25.0%", "50.0%"],
+    "Max Drawdown": [60.25, 185.5, 10.0],
+    "Sharpe Ratio": [8.377709817791741, -0.41793496818044323, -3.7416573867739413],
+    "Sortino Ratio": [50.00214871416086, -1.3754598944546808, 0.0],
+    "VaR (5%)": [-37.6875, -115.675, -9.25],
+    "CVaR (5%)": [-45.25, -125.5, -10.0],
+    "Skewness": [1.0984303629034131, 0.9367526225725259, 0.0],
+}
+EXCLUDED_METRICS = {
+    "Total Days": 6, "Total PNL": 453.75, "Total Trades": 10, "Win Days": 3, "Loss Days": 3,
+    "Win Rate (Days)": "50.00%", "Max Profit Day": "09-01-2023 (300.00)", "Max Loss Day": "10-01-2023 (-81.50)",
+    "Avg PNL per Day": 75.625,
+}
+EXCLUDED_STRATEGIES = {
+    "Strategy": ["NIFTY", "BNFxx", "FINNI"],
+    "Total PNL": [419.25, 44.5, -10.0],
+    "Days": [5, 3, 1],
+    "Win Rate": ["60.0%", "33.3%", "0.0%"],
+    "Max Drawdown": [45.25, 125.5, 0.0],
+    "Sharpe Ratio": [9.829561902726827, 1.3506330025467261, 0.0],
+    "Sortino Ratio": [0.0, 3.894824648220828, 0.0],
+    "VaR (5%)": [-36.2, -116.95, -10.0],
+    "CVaR (5%)": [-45.25, -125.5, -10.0],
+    "Skewness": [0.8265832486229071, 0.5206465732505392, 0.0],
+}
+
+
+def assert_columns(df, expected):
+    for column, values in expected.items():
+        actual = df[column].tolist()
+        if isinstance(values[0], str):
+            assert actual == values, column
+        else:
+            assert actual == pytest.approx(values), column
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_unfiltered_matches_original_analysis(backend):
+    report = parse_backtest_columns(REPORT_HTML.encode(), backend)
+    daily_df, strategy_df, metrics = analyze_columns(report)
+
+    assert_columns(daily_df, FULL_DAILY)
+    assert daily_df["Date"].tolist() == list(pd.to_datetime(FULL_DAILY["RD"], format="%d-%m-%Y"))
+    assert_columns(strategy_df, FULL_STRATEGIES)
+    assert metrics == pytest.approx(FULL_METRICS)
+
+
+def test_excluded_range_matches_analysis_without_those_days():
+    report = parse_backtest_columns(REPORT_HTML)
+    mask = day_mask(report, exclude=("2023-01-05", "2023-01-06"))
+    daily_df, strategy_df, metrics = analyze_columns(report, mask)
+
+    assert daily_df["RD"].tolist() == ["02-01-2023", "03-01-2023", "04-01-2023", "09-01-2023", "10-01-2023", "11-01-2023"]
+    assert_columns(strategy_df, EXCLUDED_STRATEGIES)
+    assert metrics == pytest.approx(EXCLUDED_METRICS)
+
+
+def test_weekday_filter_and_strategy_subset():
+    report = parse_backtest_columns(REPORT_HTML)
+    mondays = day_mask(report, weekdays=[0])
+    _, _, metrics = analyze_columns(report, mondays)
+    assert metrics["Total Days"] == 2
+    assert metrics["Total PNL"] == pytest.approx(380.5)
+
+    # Under a strategy subset daily PnL is the selected setups' PnL
+    daily_df, strategy_df, metrics = analyze_columns(report, strategies=["FINNI"])
+    assert daily_df["RD"].tolist() == ["05-01-2023", "11-01-2023"]
+    assert strategy_df["Strategy"].tolist() == ["FINNI"]
+    assert metrics["Total PNL"] == pytest.approx(-5.0)
+
+
+def test_missing_vix_is_left_out_of_day_mean():
+    no_vix = setup("NIFTY_a", 10.0)
+    del no_vix["VST"]
+    records = [{"RD": "02-01-2023", "DP": 15.0, "LR": [setup("BNFxx_b", 5.0, vix=20.0), no_vix]}]
+    report = parse_backtest_columns(f"let $_json = {json.dumps(records)};")
+
+    assert report['day_vix'].tolist() == [20.0]
+    assert day_mask(report, vix_range=(15, 25)).tolist() == [True]
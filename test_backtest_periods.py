@@ -0,0 +1,80 @@
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+
+from backtest_parser import parse_backtest_columns
+from backtest_periods import expiry_week_pnl, monthly_grid, period_tables, strategy_day_frame, weekday_stats, yearly_pnl
+from test_backtest_metrics import RECORDS, REPORT_HTML
+
+
+@pytest.fixture
+def report():
+    return parse_backtest_columns(REPORT_HTML)
+
+
+def test_monthly_grid(report):
+    grid = monthly_grid(strategy_day_frame(report))
+    assert grid.index.tolist() == [("NIFTY", 2023), ("BNFxx", 2023), ("FINNI", 2023)]
+    assert grid["Jan"].tolist() == pytest.approx([404.25, -15.5, -5.0])
+    assert grid["Total"].tolist() == pytest.approx([404.25, -15.5, -5.0])
+    assert grid["Feb"].isna().all()
+
+
+def test_yearly_pnl(report):
+    table = yearly_pnl(strategy_day_frame(report))
+    assert table.index.tolist() == [2023]
+    assert table.loc[2023].to_dict() == pytest.approx({"NIFTY": 404.25, "BNFxx": -15.5, "FINNI": -5.0, "Total": 383.75})
+
+
+def test_weekday_stats(report):
+    stats = weekday_stats(strategy_day_frame(report))
+    monday = stats.loc[("NIFTY", "Mon")]
+    assert monday["Total PNL"] == pytest.approx(420.5)
+    assert monday["Days"] == 2
+    assert monday["Win Rate"] == "100.0%"
+    assert stats.loc[("BNFxx", "Tue"), "Max Loss (Day)"] == pytest.approx(-125.5)
+    assert ("FINNI", "Mon") not in stats.index
+
+
+def test_expiry_week_pnl(report):
+    table = expiry_week_pnl(strategy_day_frame(report))
+    assert table.index.tolist() == [date(2023, 1, 5), date(2023, 1, 12)]
+    assert table.loc[date(2023, 1, 5)].to_dict() == pytest.approx({"NIFTY": 60.25, "BNFxx": 110.0, "FINNI": 5.0, "Total": 175.25})
+    assert table.loc[date(2023, 1, 12)].to_dict() == pytest.approx({"NIFTY": 344.0, "BNFxx": -125.5, "FINNI": -10.0, "Total": 208.5})
+
+    # Tuesday expiries split the same days differently
+    tuesday = expiry_week_pnl(strategy_day_frame(report), "Tue")
+    assert tuesday.index.tolist() == [date(2023, 1, 3), date(2023, 1, 10), date(2023, 1, 17)]
+    assert tuesday["Total"].sum() == pytest.approx(383.75)
+
+
+def test_period_tables_with_mask_and_strategies(report):
+    mask = np.ones(len(RECORDS), dtype=bool)
+    mask[3:5] = False
+    tables = period_tables(report, mask, ["NIFTY"])
+    assert list(tables) == ["Monthly PnL", "Yearly PnL", "Weekday Stats", "Expiry Week PnL"]
+    assert tables["Yearly PnL"].columns.tolist() == ["NIFTY", "Total"]
+    assert tables["Expiry Week PnL"]["NIFTY"].tolist() == pytest.approx([75.25, 344.0])
+
+
+@pytest.mark.parametrize("selection", [
+    {"mask": np.zeros(len(RECORDS), dtype=bool)},
+    {"strategies": []},
+])
+def test_period_tables_are_empty_when_nothing_is_selected(report, selection):
+    tables = period_tables(report, **selection)
+    assert all(table.empty for table in tables.values())
+
+
+def test_unparsable_dates_are_dropped():
+    records = json.loads(json.dumps(RECORDS))
+    records[0]["RD"] = "not a date"
+    report = parse_backtest_columns(f"let $_json = {json.dumps(records)};")
+
+    frame = strategy_day_frame(report)
+    assert frame["Date"].notna().all()
+    tables = period_tables(report)
+    assert tables["Yearly PnL"].loc[2023, "Total"] == pytest.approx(383.75 - 80.5)
+    assert tables["Weekday Stats"].loc[("NIFTY", "Mon"), "Total PNL"] == pytest.approx(300.0)
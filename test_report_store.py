@@ -0,0 +1,117 @@
+import gc
+import io
+import os
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from backtest_disk import load_columns
+from backtest_parser import parse_backtest_columns
+from report_store import ReportStore, report_nbytes
+from test_backtest_metrics import REPORT_HTML
+
+CONTENT = REPORT_HTML.encode()
+OTHER = CONTENT.replace(b"02-01-2023", b"01-01-2023")
+
+
+class CountingParse:
+    def __init__(self, parse=parse_backtest_columns, delay=0):
+        self.parse = parse
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, content):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.parse(content)
+
+
+def test_concurrent_leases_parse_once():
+    parse = CountingParse(delay=0.2)
+    store = ReportStore(parse=parse)
+    barrier = threading.Barrier(6)
+    leases = []
+
+    def lease():
+        barrier.wait()
+        leases.append(store.lease(CONTENT))
+
+    threads = [threading.Thread(target=lease) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert parse.calls == 1
+    assert len({id(lease.report) for lease in leases}) == 1
+    assert store.stats()["Sessions"] == 6
+    assert store._loading == {}
+
+
+def test_failed_parse_releases_loading_lock():
+    def parse(content):
+        raise RuntimeError("boom")
+
+    store = ReportStore(parse=parse)
+    with pytest.raises(RuntimeError):
+        store.lease(CONTENT)
+    assert store._loading == {}
+
+
+def test_release_is_idempotent():
+    store = ReportStore()
+    first, second = store.lease(CONTENT), store.lease(CONTENT)
+    first.release()
+    first.release()
+    assert store.stats()["Sessions"] == 1
+
+    del second
+    gc.collect()
+    assert store.stats()["Sessions"] == 0
+    assert store.stats()["Reports"] == 1
+
+
+def test_evicts_least_recently_used_unreferenced_reports_over_budget():
+    parse = CountingParse()
+    nbytes = report_nbytes(parse_backtest_columns(CONTENT))
+    store = ReportStore(budget_bytes=nbytes, parse=parse)
+
+    lease = store.lease(CONTENT)
+    other = store.lease(OTHER)
+    # Over budget, but both reports are in use
+    assert store.stats()["Reports"] == 2
+
+    lease.release()
+    # Releasing the older one brings the store back within budget
+    assert store.stats()["Reports"] == 1
+    assert store.get(other.key) is other.report
+    assert store.stats()["Evictions"] == 1
+
+    other.release()
+    # Within budget: unreferenced reports are kept for the next lease
+    assert store.stats()["Reports"] == 1
+    store.lease(OTHER)
+    assert parse.calls == 2
+    assert store.stats()["Hits"] == 1
+
+
+def test_out_of_core_reports_are_evicted_once_released():
+    store = ReportStore(parse=partial(load_columns, out_of_core_bytes=0))
+    lease = store.lease(io.BytesIO(CONTENT))
+    directory = os.path.dirname(lease.report['day_pnl'].filename)
+    assert store.stats()["Disk (MB)"] > 0
+
+    lease.release()
+    assert store.stats()["Reports"] == 0
+    del lease
+    gc.collect()
+    assert not os.path.exists(directory)
+
+
+def test_stored_reports_are_read_only():
+    store = ReportStore()
+    report = store.lease(CONTENT).report
+    with pytest.raises(ValueError):
+        report['day_pnl'][0] = 0